@@ -11,18 +11,158 @@ Author: Optimized Version
 Version: 8.0 - Efficient Architecture  
 """
 
-import qrcode
 import argparse
+import logging
 import sys
 import os
 from datetime import datetime
+from functools import lru_cache
+from importlib.machinery import EXTENSION_SUFFIXES
+
+log = logging.getLogger(__name__)
+
+# Pass as extra= to start a new section; the CLI prints a blank line first
+SECTION = {'section': True}
+
+# Error correction letter -> qrcodegen Ecc member name
+ECC_NAMES = {'L': 'LOW', 'M': 'MEDIUM', 'Q': 'QUARTILE', 'H': 'HIGH'}
+
+# zlib level for saved PNGs (Pillow defaults to 6): trades size for speed
+PNG_COMPRESS_LEVEL = 1
+
+
+@lru_cache(maxsize=None)
+def _qr_backend():
+    """Import the QR encoder on first use: (name, module) or (None, None)"""
+    try:
+        import qrcodegen
+    except ImportError:
+        pass
+    else:
+        # The PyPI qrcodegen is a pure-Python port and slower than qrcode;
+        # only prefer a compiled build (none is published, so this is a hook
+        # for a locally built extension)
+        module_file = getattr(qrcodegen, '__file__', None) or ''
+        if module_file.endswith(tuple(EXTENSION_SUFFIXES)):
+            return 'qrcodegen', qrcodegen
+
+    try:
+        import qrcode
+        return 'qrcode', qrcode
+    except ImportError:
+        return None, None
+
+
+def _pack_rows(matrix):
+    """Pack a module matrix into Pillow's raw '1' layout (set bit = light)"""
+    packed = bytearray()
+    for row in matrix:
+        bits = 0
+        for dark in row:
+            bits = bits << 1 | (not dark)
+        pad = -len(row) % 8  # each row starts on a byte boundary
+        packed += (bits << pad).to_bytes((len(row) + pad) // 8, 'big')
+    return bytes(packed)
+
+
+@lru_cache(maxsize=32)
+def _encode_qr(url, ecc='M'):
+    """Encode a URL and return (size, packed module rows), without border
+
+    Cached per process, so it only pays off when the class is used as a
+    library and renders the same URL more than once; the CLI and batch
+    workers encode each URL once. Packed rows keep each entry 8x smaller.
+    """
+    backend, lib = _qr_backend()
+    if backend == 'qrcodegen':
+        # encode_text() would boost the ECC level; keep exactly the one asked for
+        code = lib.QrCode.encode_segments(
+            lib.QrSegment.make_segments(url),
+            getattr(lib.QrCode.Ecc, ECC_NAMES[ecc]),
+            boostecl=False,
+        )
+        size = code.get_size()
+        matrix = [[code.get_module(x, y) for x in range(size)] for y in range(size)]
+    else:
+        qr = lib.QRCode(
+            error_correction=getattr(lib.constants, f'ERROR_CORRECT_{ecc}'),
+            border=0,
+        )
+        qr.add_data(url)
+        qr.make(fit=True)
+        matrix = qr.get_matrix()
+
+    return len(matrix), _pack_rows(matrix)
+
+
+def _render_qr(url, filename, box_size=8, border=4):
+    """Encode a URL, write it as a PNG and return the image size"""
+    from PIL import Image, ImageOps
+
+    # Medium error correction, smallest version that fits
+    size, packed = _encode_qr(url, 'M')
+
+    # One pixel per module, then pad and upscale in C (no per-box drawing)
+    img = Image.frombytes('1', (size, size), packed)
+    img = ImageOps.expand(img, border=border, fill=255)
+    width = (size + 2 * border) * box_size
+    img = img.resize((width, width), Image.NEAREST)
+    # Level 1 files are ~20-35% larger than level 6 (still under 1 KB) but
+    # save ~70 us faster per image
+    img.save(filename, compress_level=PNG_COMPRESS_LEVEL)
+    return img.size
+
+
+def _gen_one(deploy_type, url):
+    """Worker for batch_generate: render one deployment's QR code"""
+    filename = f'qr_{deploy_type}.png'
+    return filename, _render_qr(url, filename)
+
+
+def _gen_batch(jobs):
+    """Render {deploy_type: url} jobs; map each to (filename, size) or its exception
+
+    Uses a process pool when there is more than one job and more than one
+    CPU, and renders in-process otherwise or if the pool cannot run.
+    """
+    outcomes = {}
+    workers = min(len(jobs), os.cpu_count() or 1)
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {deploy_type: executor.submit(_gen_one, deploy_type, url)
+                           for deploy_type, url in jobs.items()}
+                for deploy_type, future in futures.items():
+                    try:
+                        outcomes[deploy_type] = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        outcomes[deploy_type] = e
+        except Exception as e:
+            # No semaphores, /dev/shm or multiprocessing support, or a worker died
+            log.warning("⚠️ Worker pool unavailable (%s); generating serially", e)
+
+    for deploy_type, url in jobs.items():
+        if deploy_type not in outcomes:
+            try:
+                outcomes[deploy_type] = _gen_one(deploy_type, url)
+            except Exception as e:
+                outcomes[deploy_type] = e
+
+    return outcomes
+
 
 class OptimizedARQRGenerator:
     """Lightweight and efficient QR Code Generator"""
 
     def __init__(self):
-        print("🚀 Optimized AR Surgery QR Generator v8.0")
-        print("📱 Efficient QR code generation for mobile AR")
+        log.info("🚀 Optimized AR Surgery QR Generator v8.0")
+        log.info("📱 Efficient QR code generation for mobile AR")
 
         # Repository-specific URLs
         self.urls = {
@@ -36,104 +176,152 @@ class OptimizedARQRGenerator:
 
     def check_dependencies(self):
         """Check if required dependencies are installed"""
+        backend, _ = _qr_backend()
+        if backend is None:
+            log.error("❌ Missing qrcode library. Install with: pip install qrcode[pil]")
+            return False
+
         try:
-            import qrcode
-            print("✅ QR code library installed")
-            return True
+            import PIL
         except ImportError:
-            print("❌ Missing qrcode library. Install with: pip install qrcode[pil]")
+            log.error("❌ Missing Pillow library. Install with: pip install pillow")
             return False
 
+        if backend == 'qrcodegen':
+            log.info("✅ Compiled QR encoder (qrcodegen) installed")
+        else:
+            log.info("✅ QR code library installed")
+        return True
+
     def validate_url(self, url):
         """Basic URL validation"""
         if not url or not url.strip():
             return False
         return url.startswith(('http://', 'https://'))
 
-    def create_simple_qr(self, url, filename='ar_qr.png'):
-        """Create a simple, efficient QR code"""
+    def _start_qr(self, url):
+        """Check a URL can be rendered and log the start of generation"""
         if not self.dependencies_ok:
-            print("❌ Cannot generate QR code - missing dependencies")
-            return None
+            log.error("❌ Cannot generate QR code - missing dependencies")
+            return False
 
         if not self.validate_url(url):
-            print(f"❌ Invalid URL: {url}")
-            return None
-
-        try:
-            print(f"🔲 Generating QR code for: {url}")
-
-            # Create QR code with optimal settings
-            qr = qrcode.QRCode(
-                version=1,  # Automatically adjust size
-                error_correction=qrcode.constants.ERROR_CORRECT_M,  # Medium error correction
-                box_size=8,  # Reduced box size for efficiency
-                border=4,
-            )
-
-            qr.add_data(url)
-            qr.make(fit=True)
+            log.error("❌ Invalid URL: %s", url)
+            return False
 
-            # Create and save image
-            img = qr.make_image(fill_color="black", back_color="white")
-            img.save(filename)
+        log.info("🔲 Generating QR code for: %s", url)
+        return True
 
-            print(f"✅ QR code saved: {filename}")
-            print(f"📏 Image size: {img.size}")
+    def _log_saved(self, filename, size):
+        """Log a successfully written QR image"""
+        log.info("✅ QR code saved: %s", filename)
+        log.info("📏 Image size: %s", size)
 
-            return filename
+    def create_simple_qr(self, url, filename='ar_qr.png'):
+        """Create a simple, efficient QR code"""
+        if not self._start_qr(url):
+            return None
 
+        try:
+            size = _render_qr(url, filename)
         except Exception as e:
-            print(f"❌ QR generation failed: {e}")
+            log.error("❌ QR generation failed: %s", e)
             return None
 
+        self._log_saved(filename, size)
+        return filename
+
     def generate_for_deployment(self, deployment_type='production'):
         """Generate QR code for specific deployment"""
 
         if deployment_type not in self.urls:
-            print(f"❌ Invalid deployment type: {deployment_type}")
-            print(f"Available options: {list(self.urls.keys())}")
+            log.error("❌ Invalid deployment type: %s", deployment_type)
+            log.error("Available options: %s", list(self.urls.keys()))
             return None
 
         url = self.urls[deployment_type]
         if not url:
-            print(f"❌ No URL configured for {deployment_type}")
+            log.error("❌ No URL configured for %s", deployment_type)
             return None
 
         filename = f'qr_{deployment_type}.png'
         result = self.create_simple_qr(url, filename)
 
         if result:
-            print(f"\n🎯 SUCCESS: QR code for {deployment_type.upper()}")
-            print(f"🔗 URL: {url}")
-            print(f"📄 File: {result}")
-            print("\n📱 Usage Instructions:")
-            print("1. Open smartphone camera or Google Lens")
-            print("2. Point at QR code")
-            print("3. Tap the notification to open AR surgery training")
+            self._log_usage(deployment_type, url, result)
 
         return result
 
+    def _log_usage(self, deployment_type, url, filename):
+        """Log success details and scanning instructions"""
+        log.info("🎯 SUCCESS: QR code for %s", deployment_type.upper(), extra=SECTION)
+        log.info("🔗 URL: %s", url)
+        log.info("📄 File: %s", filename)
+        log.info("📱 Usage Instructions:", extra=SECTION)
+        log.info("1. Open smartphone camera or Google Lens")
+        log.info("2. Point at QR code")
+        log.info("3. Tap the notification to open AR surgery training")
+
     def batch_generate(self):
-        """Generate QR codes for all configured deployments"""
-        print("🔄 Generating QR codes for all deployments...")
+        """Generate QR codes for all configured deployments, in parallel where it helps"""
+        log.info("🔄 Generating QR codes for all deployments...")
         results = {}
 
+        if not self.dependencies_ok:
+            log.error("❌ Cannot generate QR codes - missing dependencies")
+            return results
+
+        # Validate up front so only renderable deployments are queued
+        jobs = {}
         for deploy_type, url in self.urls.items():
             if url and deploy_type != 'custom':
-                print(f"\n--- {deploy_type.upper()} ---")
-                result = self.generate_for_deployment(deploy_type)
-                results[deploy_type] = result
-
-        print("\n" + "="*50)
-        print("📊 BATCH GENERATION SUMMARY")
-        print("="*50)
+                results[deploy_type] = None
+                if self.validate_url(url):
+                    jobs[deploy_type] = url
+
+        outcomes = _gen_batch(jobs) if jobs else {}
+
+        # Render work is done; log each deployment as one block, in order
+        for deploy_type in results:
+            url = self.urls[deploy_type]
+            log.info("--- %s ---", deploy_type.upper(), extra=SECTION)
+            if not self._start_qr(url):
+                continue
+
+            outcome = outcomes[deploy_type]
+            if isinstance(outcome, Exception):
+                log.error("❌ QR generation failed: %s", outcome)
+                continue
+
+            filename, size = outcome
+            self._log_saved(filename, size)
+            self._log_usage(deploy_type, url, filename)
+            results[deploy_type] = filename
+
+        log.info("="*50, extra=SECTION)
+        log.info("📊 BATCH GENERATION SUMMARY")
+        log.info("="*50)
         for deploy_type, result in results.items():
             status = "✅ SUCCESS" if result else "❌ FAILED"
-            print(f"{deploy_type.upper()}: {status}")
+            log.info("%s: %s", deploy_type.upper(), status)
 
         return results
 
+class _CLIFormatter(logging.Formatter):
+    """Bare messages, with a blank line before each SECTION record"""
+
+    def format(self, record):
+        text = super().format(record)
+        return '\n' + text if getattr(record, 'section', False) else text
+
+def setup_logging(quiet=False):
+    """Send generator messages to stdout, alongside the CLI's own prints"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(_CLIFormatter('%(message)s'))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+    if quiet:
+        logging.disable(logging.INFO)
+
 def main():
     """Command line interface"""
     parser = argparse.ArgumentParser(description='Generate QR codes for AR Surgery Training')
@@ -143,9 +331,13 @@ def main():
                        help='Deployment type or batch generation')
     parser.add_argument('--url', '-u', type=str, 
                        help='Custom URL (overrides default)')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='Only report errors')
 
     args = parser.parse_args()
 
+    setup_logging(quiet=args.quiet)
+
     generator = OptimizedARQRGenerator()
 
     if not generator.dependencies_ok:
@@ -172,6 +364,7 @@ def main():
 if __name__ == "__main__":
     if len(sys.argv) == 1:
         # Interactive mode
+        setup_logging()
         print("🏥 AR Surgery QR Generator - Interactive Mode")
         print("="*50)
         generator = OptimizedARQRGenerator()